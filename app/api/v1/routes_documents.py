@@ -1,35 +1,51 @@
 # app/api/v1/routes_documents.py
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
+from fastapi import APIRouter, UploadFile, File, HTTPException
+import asyncio
 import logging
-from app.processors.file_processor import FileProcessor
-from app.db.crud import get_summary_by_file_hash, save_file_summary
-from app.api.deps import get_db
+import os
+from app.core.config import settings
+from app.processors.uploads import StagedUpload
+from app.core.cache import get_cached_summary, set_cached_summary_async
+from app.db.crud import get_summary_by_file_hash
+from app.db.session import AsyncSessionLocal
+from app.tasks.celery_app import celery
 
 logger = logging.getLogger("routes_documents")
 router = APIRouter(prefix="/v1/documents", tags=["documents"])
 
 @router.post("/upload")
-async def upload_document(file: UploadFile = File(...), db=Depends(get_db)):
+async def upload_document(file: UploadFile = File(...)):
     # validate extension
-    ext = "." + file.filename.split(".")[-1].lower()
-    from app.core.config import settings
+    ext = os.path.splitext(file.filename)[1].lower()
     if ext not in settings.ALLOWED_FILE_EXTENSIONS:
         raise HTTPException(status_code=400, detail="File type not supported")
 
-    processor = FileProcessor(file=file, db=db, include_examples=True)
-    cached = get_summary_by_file_hash(db, processor.file_hash)
-    if cached:
-        return {"structured_notes": cached, "cached": True, "processing_time_minutes": 0.0}
-
+    upload = await StagedUpload.create(file)
     try:
-        # await the async method
-        result = processor.process_file()
-        processing_time_min = result["processing_time"] / 60
-        return {
-            "structured_notes": result["structured_notes"],
-            "cached": False,
-            "processing_time_minutes": round(processing_time_min, 2)
-        }
-    except Exception as e:
-        logger.error("Document processing failed: %s", e)
-        raise HTTPException(status_code=500, detail=str(e))
+        cached = await get_cached_summary(upload.file_hash)
+        if not cached:
+            async with AsyncSessionLocal() as db:
+                cached = await get_summary_by_file_hash(db, upload.file_hash)
+            if cached:
+                await set_cached_summary_async(upload.file_hash, cached)
+        if cached:
+            upload.cleanup()
+            return {"structured_notes": cached, "cached": True, "processing_time_minutes": 0.0}
+
+        # the worker picks the file up from the shared upload dir
+        await asyncio.to_thread(upload.persist)
+        try:
+            # by name, so the API never imports the extraction/LLM stack
+            task = celery.send_task(
+                "app.tasks.notes_tasks.process_document_task",
+                args=[upload.temp_dir, upload.temp_path, upload.file_hash, upload.file_name, True],
+            )
+        except Exception as e:
+            logger.error("Failed to enqueue document job: %s", e)
+            raise HTTPException(status_code=503, detail="Job queue unavailable")
+    except BaseException:
+        # don't leave a staged file in the shared upload dir that no worker will pick up
+        upload.cleanup()
+        raise
+
+    return {"job_id": task.id, "status_url": f"/v1/jobs/{task.id}", "cached": False}
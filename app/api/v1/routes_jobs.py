@@ -0,0 +1,17 @@
+# app/api/v1/routes_jobs.py
+from fastapi import APIRouter
+from celery.result import AsyncResult
+from app.tasks.celery_app import celery
+
+router = APIRouter(prefix="/v1/jobs", tags=["jobs"])
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    job = AsyncResult(job_id, app=celery)
+    response = {"job_id": job_id, "status": job.status}
+    if job.successful():
+        response["result"] = job.result
+    elif job.failed():
+        response["error"] = str(job.result)
+    return response
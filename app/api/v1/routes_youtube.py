@@ -1,12 +1,13 @@
 # app/api/v1/routes_youtube.py
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import hashlib
 import logging
-from app.processors.youtube_processor import YouTubeProcessor
-from app.db.crud import get_summary_by_file_hash, save_file_summary
-from app.api.deps import get_db
+from app.core.cache import get_cached_summary, set_cached_summary_async
+from app.db.crud import get_summary_by_file_hash
+from app.db.session import AsyncSessionLocal
+from app.processors.youtube_urls import video_url_hash
 from app.core.config import settings
+from app.tasks.celery_app import celery
 
 logger = logging.getLogger("routes_youtube")
 router = APIRouter(prefix="/v1/youtube", tags=["youtube"])
@@ -15,16 +16,21 @@ class URLRequest(BaseModel):
     youtube_url: str
 
 @router.post("/notes")
-def youtube_notes(request: URLRequest, db=Depends(get_db)):
-    url_hash = hashlib.sha256(request.youtube_url.encode()).hexdigest()
-    cached = get_summary_by_file_hash(db, url_hash)
+async def youtube_notes(request: URLRequest):
+    # key on the video, not the URL spelling, so youtu.be/X and watch?v=X share a cache entry
+    url_hash = video_url_hash(request.youtube_url)
+    cached = await get_cached_summary(url_hash)
+    if not cached:
+        async with AsyncSessionLocal() as db:
+            cached = await get_summary_by_file_hash(db, url_hash)
+        if cached:
+            await set_cached_summary_async(url_hash, cached)
     if cached:
         return {"notes": cached, "cached": True}
-    processor = YouTubeProcessor(url=request.youtube_url)
     try:
-        result = processor.process_video()
-        save_file_summary(db, url_hash, "youtube_audio", result["structured_notes"])
-        return {"notes": result["structured_notes"], "cached": False}
+        # by name, so the API never imports the Whisper/yt-dlp stack
+        task = celery.send_task("app.tasks.notes_tasks.process_youtube_task", args=[request.youtube_url, url_hash])
     except Exception as e:
-        logger.error("YouTube processing failed: %s", e)
-        raise HTTPException(status_code=500, detail=str(e))
+        logger.error("Failed to enqueue YouTube job: %s", e)
+        raise HTTPException(status_code=503, detail="Job queue unavailable")
+    return {"job_id": task.id, "status_url": f"/v1/jobs/{task.id}", "cached": False}
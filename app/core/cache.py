@@ -0,0 +1,98 @@
+# app/core/cache.py
+import json
+import logging
+from contextlib import contextmanager
+import redis
+import redis.asyncio as aioredis
+from cachetools import LRUCache
+from sqlalchemy import text
+from app.core.config import settings
+from app.db.session import engine
+
+logger = logging.getLogger("cache")
+
+SUMMARY_TTL = 86400  # seconds
+LOCK_TTL = 3600  # upper bound on one pipeline run
+
+# sync client for Celery workers, async client for the API event loop
+_redis = redis.Redis.from_url(settings.REDIS_URL)
+_aredis = aioredis.Redis.from_url(settings.REDIS_URL)
+
+# Hot summaries served from process memory, no network trip at all.
+# Summaries are never modified once stored, so entries can't go stale.
+_local = LRUCache(maxsize=512)
+
+
+def _summary_key(file_hash: str) -> str:
+    return f"sum:{file_hash}"
+
+
+async def get_cached_summary(file_hash: str):
+    """Return the cached {summary_text, token_usage} dict, or None on miss / Redis down."""
+    summary = _local.get(file_hash)
+    if summary is not None:
+        return summary
+    try:
+        raw = await _aredis.get(_summary_key(file_hash))
+    except redis.RedisError as e:
+        logger.warning("Redis read failed: %s", e)
+        return None
+    if not raw:
+        return None
+    summary = _local[file_hash] = json.loads(raw)
+    return summary
+
+
+async def set_cached_summary_async(file_hash: str, summary: dict):
+    _local[file_hash] = summary
+    try:
+        await _aredis.setex(_summary_key(file_hash), SUMMARY_TTL, json.dumps(summary))
+    except redis.RedisError as e:
+        logger.warning("Redis write failed: %s", e)
+
+
+def set_cached_summary(file_hash: str, summary: dict):
+    try:
+        _redis.setex(_summary_key(file_hash), SUMMARY_TTL, json.dumps(summary))
+    except redis.RedisError as e:
+        logger.warning("Redis write failed: %s", e)
+
+
+@contextmanager
+def _advisory_lock(file_hash: str):
+    """Session-level Postgres advisory lock on a dedicated connection."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("SELECT pg_advisory_lock(hashtextextended(:key, 0))"), {"key": file_hash})
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(hashtextextended(:key, 0))"), {"key": file_hash})
+
+
+@contextmanager
+def summary_lock(file_hash: str):
+    """Let only one worker at a time run the pipeline for a given hash.
+
+    Uses a Redis lock, falling back to a Postgres advisory lock when Redis is unreachable.
+    Callers should re-check the summary cache once inside the lock.
+    """
+    lock = _redis.lock(f"lock:{file_hash}", timeout=LOCK_TTL, blocking_timeout=LOCK_TTL)
+    try:
+        acquired = lock.acquire()
+    except redis.RedisError as e:
+        logger.warning("Redis lock unavailable (%s), using Postgres advisory lock", e)
+        acquired = None
+
+    if acquired is None:
+        with _advisory_lock(file_hash):
+            yield
+        return
+
+    try:
+        yield
+    finally:
+        if acquired:
+            try:
+                lock.release()
+            except redis.RedisError as e:
+                logger.warning("Redis lock release failed: %s", e)
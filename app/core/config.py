@@ -1,6 +1,7 @@
 # app/core/config.py
 from pydantic_settings import BaseSettings
 from typing import List, Set
+from functools import lru_cache
 import os
 from dotenv import load_dotenv
 
@@ -20,6 +21,15 @@ class Settings(BaseSettings):
     LOCATION: str = os.getenv("LOCATION", "us-central1")
     GOOGLE_APPLICATION_CREDENTIALS: str = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
 
+    # Background jobs (Celery)
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    # Must be a volume shared between the API and the Celery workers
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "/tmp/notes_uploads")
+
+    # Persistent LibreOffice converter (unoserver) started with each worker node
+    UNOSERVER_HOST: str = os.getenv("UNOSERVER_HOST", "127.0.0.1")
+    UNOSERVER_PORT: int = int(os.getenv("UNOSERVER_PORT", "2003"))
+
     # Security / CORS
     ALLOWED_ORIGINS: List[str] = os.getenv("ALLOWED_ORIGINS", "http://localhost:3000").split(",")
     ALLOWED_FILE_EXTENSIONS: Set[str] = {".pdf", ".docx", ".doc", ".txt", ".ppt", ".pptx"}
@@ -28,4 +38,10 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
-settings = Settings()
+@lru_cache
+def get_settings() -> Settings:
+    """Parse settings once; usable as a FastAPI dependency that tests can override."""
+    return Settings()
+
+
+settings = get_settings()
@@ -1,11 +1,15 @@
 # app/core/logging_config.py
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
 
 LOG_FILE = os.getenv("LOG_FILE", "app.log")
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 
+_listener = None
+
 def configure_logging():
     root = logging.getLogger()
     root.setLevel(LOG_LEVEL)
@@ -15,9 +19,26 @@ def configure_logging():
     # console
     ch = logging.StreamHandler()
     ch.setFormatter(formatter)
-    root.addHandler(ch)
 
-    # rotating file
-    fh = RotatingFileHandler(LOG_FILE, maxBytes=10*1024*1024, backupCount=3)
+    # rotating file (opened on first write)
+    fh = RotatingFileHandler(LOG_FILE, maxBytes=10*1024*1024, backupCount=3, delay=True)
     fh.setFormatter(formatter)
-    root.addHandler(fh)
+
+    # request handlers only enqueue records; a background thread owns the console/file writes and rotation.
+    # The thread is started per process by start_log_listener(): threads don't survive fork,
+    # so one started at import in a preloading parent would leave the workers' queues undrained.
+    global _listener
+    log_queue = queue.Queue(-1)
+    root.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, ch, fh, respect_handler_level=True)
+
+
+def start_log_listener():
+    """Start draining the log queue in this process (call once per worker, after fork)."""
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def stop_log_listener():
+    atexit.unregister(_listener.stop)
+    _listener.stop()
@@ -1,9 +1,17 @@
+import csv
+import io
 from app.db.models import FileSummary, FileChunk
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from datetime import datetime
 
-def get_summary_by_file_hash(db: Session, file_hash: str):
-    result = db.query(FileSummary).filter(FileSummary.file_hash == file_hash).first()
+# At this many rows COPY beats even batched INSERT
+COPY_THRESHOLD = 100
+
+async def get_summary_by_file_hash(db: AsyncSession, file_hash: str):
+    stmt = select(FileSummary).where(FileSummary.file_hash == file_hash)
+    result = (await db.execute(stmt)).scalar_one_or_none()
     if result:
         return {
             "summary_text": result.summary_text,
@@ -11,18 +19,29 @@ def get_summary_by_file_hash(db: Session, file_hash: str):
         }
     return None
 
+def get_file_summary(db: Session, file_hash: str):
+    row = db.execute(
+        select(FileSummary.summary_text, FileSummary.token_usage).where(FileSummary.file_hash == file_hash)
+    ).first()
+    if row:
+        return {"summary_text": row.summary_text, "token_usage": row.token_usage}
+    return None
+
 def save_file_summary(db: Session, file_hash: str, file_name: str, summary_text: str, token_usage: dict = None):
-    summary = FileSummary(
-        file_hash=file_hash,
-        file_name=file_name,
-        summary_text=summary_text,
-        token_usage=token_usage,
-        created_at=datetime.utcnow()
+    """Insert the summary unless one already exists for file_hash; return the stored row as a dict.
+
+    The no-op DO UPDATE makes RETURNING yield the existing row on conflict, so both
+    outcomes take a single round-trip.
+    """
+    stmt = pg_insert(FileSummary).values(
+        file_hash=file_hash, file_name=file_name, summary_text=summary_text, token_usage=token_usage
     )
-    db.add(summary)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["file_hash"], set_={"file_hash": stmt.excluded.file_hash}
+    ).returning(FileSummary.summary_text, FileSummary.token_usage)
+    row = db.execute(stmt).one()
     db.commit()
-    db.refresh(summary)
-    return summary
+    return {"summary_text": row.summary_text, "token_usage": row.token_usage}
 
 def cache_chunk(db: Session, chunk_id: str, file_name: str, chunk_index: int, chunk_text: str, summary_text: str):
     chunk = FileChunk(
@@ -30,13 +49,43 @@ def cache_chunk(db: Session, chunk_id: str, file_name: str, chunk_index: int, ch
         file_name=file_name,
         chunk_index=chunk_index,
         chunk_text=chunk_text,
-        summary_text=summary_text,
-        created_at=datetime.utcnow()
+        summary_text=summary_text
     )
     db.add(chunk)
     db.commit()
     db.refresh(chunk)
     return chunk
 
+def bulk_cache_chunks(db: Session, chunks_data: list[dict]):
+    """Insert many chunks in one executemany round-trip instead of one commit per chunk.
+
+    Each dict holds chunk_id, file_name, chunk_index, chunk_text and summary_text.
+    """
+    if not chunks_data:
+        return
+    if len(chunks_data) >= COPY_THRESHOLD and db.get_bind().dialect.name == "postgresql":
+        return bulk_cache_chunks_copy(db, chunks_data)
+    db.execute(insert(FileChunk), chunks_data)
+    db.commit()
+
+def bulk_cache_chunks_copy(db: Session, chunks_data: list[dict]):
+    """Stream chunks into file_chunks with PostgreSQL COPY (psycopg2 copy_expert)."""
+    buf = io.StringIO()
+    # QUOTE_ALL so empty strings stay '' instead of being read back as NULL
+    writer = csv.writer(buf, quoting=csv.QUOTE_ALL)
+    for row in chunks_data:
+        writer.writerow([row["chunk_id"], row["file_name"], row["chunk_index"], row["chunk_text"], row["summary_text"]])
+    buf.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.copy_expert(
+            "COPY file_chunks (chunk_id, file_name, chunk_index, chunk_text, summary_text) FROM STDIN WITH (FORMAT csv)",
+            buf,
+        )
+    finally:
+        cursor.close()
+    db.commit()
+
 def get_chunks_by_file(db: Session, file_name: str):
     return db.query(FileChunk).filter(FileChunk.file_name == file_name).order_by(FileChunk.chunk_index).all()
@@ -1,17 +1,25 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
-from datetime import datetime
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, Index, UniqueConstraint, func
+from sqlalchemy.dialects.postgresql import JSONB
 
 Base = declarative_base()
 
 class FileSummary(Base):
     __tablename__ = "file_summaries"
+    __table_args__ = (
+        UniqueConstraint("file_hash", name="uq_file_summaries_file_hash"),
+        # cache lookups are pure equality probes -> O(1) hash index.
+        # No covering INCLUDE(summary_text): notes routinely exceed the ~2.7KB B-tree row limit.
+        Index("ix_file_summaries_hash_h", "file_hash", postgresql_using="hash"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    file_hash = Column(String, unique=True, index=True, nullable=False)
+    file_hash = Column(String, nullable=False)
     file_name = Column(String, nullable=False)
     summary_text = Column(Text, nullable=False)
-    token_usage = Column(JSON, nullable=True)  # NEW COLUMN for Gemini token usage
-    created_at = Column(DateTime, default=datetime.utcnow)
+    # JSONB on Postgres: smaller on disk and returned as a dict with no parse step.
+    # Existing databases: ALTER TABLE file_summaries ALTER COLUMN token_usage TYPE JSONB USING token_usage::jsonb;
+    token_usage = Column(JSON().with_variant(JSONB, "postgresql"), nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
 class FileChunk(Base):
     __tablename__ = "file_chunks"
@@ -21,4 +29,4 @@ class FileChunk(Base):
     chunk_index = Column(Integer, nullable=False)
     chunk_text = Column(Text, nullable=False)
     summary_text = Column(Text, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,7 +1,70 @@
 # app/db/session.py
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import asyncio
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker, scoped_session
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {})
+POOL_SIZE = 20
+# connections opened per process at startup; the rest of the pool fills on demand
+WARM_POOL_SIZE = 2
+
+# The data layer relies on Postgres-only SQL (ON CONFLICT, xmax, advisory locks, COPY)
+DATABASE_URL = make_url(settings.DATABASE_URL)
+if DATABASE_URL.drivername == "postgres":  # Heroku-style scheme SQLAlchemy doesn't register
+    DATABASE_URL = DATABASE_URL.set(drivername="postgresql")
+
+engine = create_engine(
+    DATABASE_URL,
+    pool_size=POOL_SIZE,
+    max_overflow=10,
+    pool_timeout=30,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+    insertmanyvalues_page_size=1000,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ScopedSession = scoped_session(SessionLocal)
+
+
+class SessionManager:
+    """Check a scoped session out of the pool and hand the connection back on exit.
+
+    Keep the block short (no awaits, no LLM calls) so connections are not held
+    while a request waits on something else.
+    """
+
+    def __enter__(self):
+        self.db = ScopedSession()
+        return self.db
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.db.rollback()
+        ScopedSession.remove()
+
+
+# Async engine (asyncpg) for the request-path cache lookups
+async_engine = create_async_engine(
+    DATABASE_URL.set(drivername="postgresql+asyncpg"),
+    pool_size=POOL_SIZE,
+    max_overflow=10,
+    # fail fast instead of piling up coroutines waiting on a starved pool
+    pool_timeout=2.0,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+async def warm_up_async_pool(size: int = WARM_POOL_SIZE):
+    """Open `size` connections up front so the first requests don't pay connect latency.
+
+    Kept small: every API worker runs this, and they all share Postgres's max_connections.
+    """
+    async def _ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(_ping() for _ in range(size)))
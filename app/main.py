@@ -2,11 +2,11 @@
 import logging
 from fastapi import FastAPI
 from app.core.config import settings
-from app.core.logging_config import configure_logging
+from app.core.logging_config import configure_logging, start_log_listener, stop_log_listener
 from app.core.middleware import add_middlewares
-from app.db.session import engine
+from app.db.session import engine, async_engine, warm_up_async_pool
 from app.db.models import Base
-from app.api.v1 import routes_documents, routes_youtube
+from app.api.v1 import routes_documents, routes_youtube, routes_jobs
 
 # configure logging
 configure_logging()
@@ -23,11 +23,16 @@ add_middlewares(app)
 # include routers
 app.include_router(routes_documents.router)
 app.include_router(routes_youtube.router)
+app.include_router(routes_jobs.router)
 
 @app.on_event("startup")
 async def startup_event():
+    start_log_listener()
     logger.info("🚀 Application startup")
+    await warm_up_async_pool()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("🛑 Application shutdown")
+    await async_engine.dispose()
+    stop_log_listener()
@@ -1,8 +1,11 @@
 import os
+import asyncio
+import itertools
 import logging
+import re
 import time
-import tiktoken
 from google import genai
+from google.genai import errors as genai_errors
 from google.genai import types
 
 from app.core.config import settings
@@ -22,6 +25,12 @@ CLIENT = genai.Client(
 
 MODEL_NAME = "gemini-2.5-flash"
 
+# Max in-flight Gemini requests per summary; keeps us under the project RPM quota
+GEMINI_CONCURRENCY = 8
+GEMINI_MAX_RETRIES = 3
+# A final chunk smaller than this fraction of max_tokens is merged into the previous one
+MIN_TAIL_FRACTION = 0.1
+
 # -------------------------------------
 # Prompt Builders
 # -------------------------------------
@@ -86,6 +95,9 @@ Instructions:
 # -------------------------------------
 # Markdown Cleaner
 # -------------------------------------
+_MD_CLEAN = re.compile(r"\\n|\\`|\*\* \*\*|  \*|  -|\r")
+_MD_MAP = {"\\n": "\n", "\\`": "`", "** **": "**", "  *": "-", "  -": "-", "\r": ""}
+
 def clean_markdown(text: str) -> str:
     """
     Cleans the generated text so it renders properly in Markdown viewers.
@@ -93,108 +105,141 @@ def clean_markdown(text: str) -> str:
     if not text:
         return ""
 
-    text = (
-        text.replace("\\n", "\n")
-        .replace("\\`", "`")
-        .replace("** **", "**")
-        .replace("  *", "-")
-        .replace("  -", "-")
-        .replace("\r", "")
-    )
-
-    lines = [line.strip() for line in text.splitlines()]
-    cleaned = "\n".join(line for line in lines if line)
+    # one pass for all fix-ups instead of a chain of str.replace copies
+    text = _MD_CLEAN.sub(lambda m: _MD_MAP[m.group(0)], text)
+
+    cleaned = "\n".join(line for line in (raw.strip() for raw in text.splitlines()) if line)
     return cleaned.strip()
 
 # -------------------------------------
 # Token Tools
 # -------------------------------------
-def count_tokens(text: str) -> int:
-    encoding = tiktoken.get_encoding("cl100k_base")
-    return len(encoding.encode(text))
+# cl100k averages ~4 characters per token on English prose
+CHARS_PER_TOKEN = 4
 
 def split_text_smart(text: str, max_tokens: int = 90_000):
     """
-    Split text intelligently based on token limits, avoiding mid-sentence breaks.
+    Lazily yield chunks within token limits, avoiding mid-sentence breaks.
+    The token budget is approximated in characters, so no tokenizer pass is needed.
     """
-    encoding = tiktoken.get_encoding("cl100k_base")
-    tokens = encoding.encode(text)
+    max_chars = max_tokens * CHARS_PER_TOKEN
 
-    chunks = []
+    pending = None  # one chunk of lookahead, so an undersized tail can be folded in
     start = 0
-    while start < len(tokens):
-        end = min(start + max_tokens, len(tokens))
-        chunk_tokens = tokens[start:end]
-        chunk_text = encoding.decode(chunk_tokens)
-
-        last_sentence_end = max(chunk_text.rfind("."), chunk_text.rfind("\n"))
-        if last_sentence_end > 0 and end != len(tokens):
-            chunk_text = chunk_text[:last_sentence_end + 1]
-
-        chunks.append(chunk_text)
-        start += len(encoding.encode(chunk_text))
-
-    return chunks
+    while start < len(text):
+        end = min(start + max_chars, len(text))
+        if end != len(text):
+            # snap back to the last sentence/line boundary in the window
+            boundary = max(text.rfind(".", start, end), text.rfind("\n", start, end))
+            if boundary > start:
+                end = boundary + 1
+
+        if pending is not None:
+            # Fold an undersized tail into the previous chunk: one Gemini call fewer,
+            # and the merged chunk is still far below the model's input limit
+            if end == len(text) and end - start < max_chars * MIN_TAIL_FRACTION:
+                yield text[pending:end]
+                return
+            yield text[pending:start]
+
+        pending = start
+        start = end
+
+    if pending is not None:
+        yield text[pending:]
 
 # -------------------------------------
 # Gemini API Wrapper
 # -------------------------------------
-def generate_content(prompt: str, max_output_tokens: int = 60000, temperature: float = 0.3):
+def _parse_response(response, duration: float):
+    """Extract cleaned text and token usage stats from a Gemini response."""
+    # Extract text safely
+    raw_text = ""
+    if hasattr(response, "text") and response.text:
+        raw_text = response.text
+    elif hasattr(response, "candidates") and response.candidates:
+        raw_text = response.candidates[0].content.parts[0].text
+
+    cleaned_text = clean_markdown(raw_text)
+
+    # Token usage info
+    usage = getattr(response, "usage_metadata", None)
+    token_usage = {
+        "input_tokens": getattr(usage, "input_tokens", None),
+        "output_tokens": getattr(usage, "output_tokens", None),
+        "total_tokens": getattr(usage, "total_tokens", None),
+        "generation_time": round(duration, 2),
+    }
+
+    return cleaned_text, token_usage
+
+async def generate_content_async(prompt: str, max_output_tokens: int = 60000, temperature: float = 0.3):
     """
-    Calls Gemini API and returns cleaned text with token usage stats.
+    Calls Gemini API on the async client and returns cleaned text with token usage stats.
+    Retries with backoff when Gemini rate-limits (429); any other failure is raised so
+    the job fails instead of an error string being stored and cached as the notes.
     """
-    try:
-        start_time = time.time()
-        response = CLIENT.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt,
-            config=types.GenerateContentConfig(
-                temperature=temperature,
-                max_output_tokens=max_output_tokens,
-            ),
-        )
-        duration = time.time() - start_time
-
-        # Extract text safely
-        raw_text = ""
-        if hasattr(response, "text") and response.text:
-            raw_text = response.text
-        elif hasattr(response, "candidates") and response.candidates:
-            raw_text = response.candidates[0].content.parts[0].text
-
-        cleaned_text = clean_markdown(raw_text)
-
-        # Token usage info
-        usage = getattr(response, "usage_metadata", None)
-        token_usage = {
-            "input_tokens": getattr(usage, "input_tokens", None),
-            "output_tokens": getattr(usage, "output_tokens", None),
-            "total_tokens": getattr(usage, "total_tokens", None),
-            "generation_time": round(duration, 2),
-        }
-
-        return cleaned_text, token_usage
-
-    except Exception as e:
-        logger.error("Gemini LLM call failed: %s", e)
-        return f"[Error: {e}]", {"error": str(e)}
+    start_time = time.time()
+    for attempt in range(GEMINI_MAX_RETRIES + 1):
+        try:
+            response = await CLIENT.aio.models.generate_content(
+                model=MODEL_NAME,
+                contents=prompt,
+                config=types.GenerateContentConfig(
+                    temperature=temperature,
+                    max_output_tokens=max_output_tokens,
+                ),
+            )
+            break
+        except genai_errors.APIError as e:
+            if e.code != 429 or attempt == GEMINI_MAX_RETRIES:
+                logger.error("Gemini LLM call failed: %s", e)
+                raise
+            backoff = 2 ** attempt
+            logger.warning("Gemini rate limited, retrying in %ds", backoff)
+            await asyncio.sleep(backoff)
+    return _parse_response(response, time.time() - start_time)
 
 # -------------------------------------
 # YouTube Summarization
 # -------------------------------------
-def generate_youtube_summary(text: str, max_sentences: int = 5, include_examples: bool = False, delay: float = 0.3):
+async def generate_youtube_summary(text: str, max_sentences: int = 5, include_examples: bool = False):
     """
     Summarize long YouTube transcripts or articles into Markdown notes.
-    Splits content intelligently into token-safe chunks.
+    Splits content intelligently into token-safe chunks and summarizes them concurrently.
     """
     chunks = split_text_smart(text)
+    head = [c for c in (next(chunks, None), next(chunks, None)) if c is not None]
+    if len(head) == 1:
+        # Fits in one request: the response is already cleaned, nothing to merge
+        prompt = build_youtube_prompt(head[0], max_sentences=max_sentences, include_examples=include_examples)
+        return await generate_content_async(prompt)
+
+    sem = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
+    async def summarize_chunk(i: int, chunk: str):
+        async with sem:
+            logger.info("Summarizing chunk %d", i)
+            prompt = build_youtube_prompt(chunk, max_sentences=max_sentences, include_examples=include_examples)
+            return await generate_content_async(prompt)
+
+    # Start each request as soon as its chunk is cut instead of after the whole split
+    tasks = []
+    for i, chunk in enumerate(itertools.chain(head, chunks), start=1):
+        tasks.append(asyncio.create_task(summarize_chunk(i, chunk)))
+        await asyncio.sleep(0)  # let the request go out before cutting the next chunk
+
+    # gather preserves chunk order; if one chunk fails, don't leave the rest running
+    try:
+        results = await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
     summaries = []
     total_usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
-
-    for i, chunk in enumerate(chunks, start=1):
-        logger.info("Summarizing chunk %d/%d", i, len(chunks))
-        prompt = build_youtube_prompt(chunk, max_sentences=max_sentences, include_examples=include_examples)
-        summary, usage = generate_content(prompt)
+    for summary, usage in results:
         summaries.append(summary)
 
         # Aggregate token usage
@@ -202,18 +247,16 @@ def generate_youtube_summary(text: str, max_sentences: int = 5, include_examples
             if k in usage and isinstance(usage[k], (int, float)):
                 total_usage[k] += usage[k]
 
-        time.sleep(delay)
-
     merged_summary = "\n\n".join(summaries)
     return clean_markdown(merged_summary), total_usage
 
 # -------------------------------------
 # Notes Rewriting (Full)
 # -------------------------------------
-def rewrite_notes_full(text: str, include_examples: bool = False):
+async def rewrite_notes_full(text: str, include_examples: bool = False):
     """
     Rewrite a full uploaded notes document, preserving structure and returning token usage.
     """
     prompt = build_notes_prompt(text, include_examples)
-    rewritten_text, token_usage = generate_content(prompt, max_output_tokens=65000)
+    rewritten_text, token_usage = await generate_content_async(prompt, max_output_tokens=65000)
     return rewritten_text, token_usage
@@ -1,16 +1,20 @@
 # app/models/llm/local_model.py
 import logging
+import os
 import time
 from llama_cpp import Llama
 from app.core.config import settings
 
 logger = logging.getLogger("local_model")
 
-_llm = None
-
 
 def load_local_model(
-    model_path: str = None, n_ctx: int = 4096, n_threads: int = 8, n_gpu_layers: int = 0
+    model_path: str = None,
+    n_ctx: int = 4096,
+    n_threads: int = 8,
+    n_threads_batch: int = None,
+    n_batch: int = 512,
+    n_gpu_layers: int = 0,
 ):
     model_path = model_path or settings.MODEL_PATH
     logger.info("Loading local LLaMA model from %s", model_path)
@@ -19,19 +23,48 @@ def load_local_model(
         model_path=model_path,
         n_ctx=n_ctx,
         n_threads=n_threads,
+        # prompt processing is batched and parallelizes well: use every core
+        n_threads_batch=n_threads_batch or os.cpu_count(),
+        n_batch=n_batch,
         n_gpu_layers=n_gpu_layers,
+        # mmap'd weights are shared copy-on-write by forked (preloaded) workers
+        use_mmap=True,
+        use_mlock=False,
     )
     logger.info("Loaded model in %.2f seconds", time.time() - start)
     return llm
 
 
+_llm = None
+
+
 def get_llm():
+    """Load the model on first use, so importing this module doesn't require the GGUF file."""
     global _llm
     if _llm is None:
         _llm = load_local_model()
     return _llm
 
 
+# KV-cache snapshots of the static instruction prefixes, keyed by prefix text
+_prefix_states = {}
+
+
+def _load_prefix_state(llm, prefix: str):
+    """Put the model in the state right after `prefix`, evaluating it only the first time.
+
+    llama_cpp skips re-processing the longest prompt prefix that matches the loaded
+    state, so each call then only pays for the variable text.
+    """
+    state = _prefix_states.get(prefix)
+    if state is None:
+        llm.reset()
+        llm.eval(llm.tokenize(prefix.encode("utf-8")))
+        _prefix_states[prefix] = llm.save_state()
+    else:
+        llm.load_state(state)
+
+
 def local_summarize_text(
     text: str,
     max_sentences: int = 2,
@@ -39,22 +72,21 @@ def local_summarize_text(
     subject: str = "general",
 ):
     llm = get_llm()
-    prompt = (
-        f"Summarize the following content into clear, structured Markdown study notes ({max_sentences} sentences):\n\n"
-        f"{text}\n\n"
+    # Static instructions first so they form a reusable prefix; the chunk goes last
+    prefix = (
+        f"Summarize the following content into clear, structured Markdown study notes ({max_sentences} sentences).\n\n"
         "Instructions:\n"
         "- Use headings and bullet points.\n"
         "- Use simple, student-friendly language.\n"
         "- Remove repetition and irrelevant details.\n"
-        "- Present examples or analogies if needed.\n\n"
-        "Output only the structured notes:"
+        "- Present examples or analogies if needed.\n"
     )
-
     if include_examples:
-        prompt += (
-            "Also provide a small example or analogy appropriate for students.\n\n"
-        )
-    prompt += "Summary:"
+        prefix += "- Also provide a small example or analogy appropriate for students.\n"
+    prefix += "- Output only the structured notes.\n\nContent:\n"
+
+    _load_prefix_state(llm, prefix)
+    prompt = f"{prefix}{text}\n\nSummary:"
     resp = llm(prompt, max_tokens=256, temperature=0.3)
     return resp["choices"][0]["text"].strip()
 
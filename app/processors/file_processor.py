@@ -1,54 +1,116 @@
 import os
-import tempfile
+import asyncio
 import shutil
-import hashlib
 import logging
 import subprocess
 import time
-import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 import fitz  # PyMuPDF for PDF text extraction
-from sqlalchemy import text
-from sqlalchemy.exc import IntegrityError
+import pytesseract
+from docx import Document
+from docx.oxml.ns import qn
+from docx.table import Table
+from docx.text.paragraph import Paragraph
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from pdf2image import convert_from_path
+from sqlalchemy import bindparam, text
+from sqlalchemy.dialects.postgresql import JSONB
 import tiktoken
 
+from app.db.session import SessionManager
 from app.models.llm.gemini_model import rewrite_notes_full
+from app.processors import libreoffice_server
 
 logger = logging.getLogger("file_processor")
 
 MAX_INPUT_TOKENS = 1_048_576  # Gemini model input limit
+OCR_THREADS = 4  # OCR runs in pdftoppm/tesseract subprocesses; threads only wait on them
 
 
-class FileProcessor:
-    def __init__(self, file, db, include_examples: bool = True):
-        self.file = file
-        self.db = db
-        self.include_examples = include_examples
+@lru_cache(maxsize=None)
+def _encoder():
+    # loaded on first oversized document only: get_encoding may fetch the vocab over the network
+    return tiktoken.get_encoding("cl100k_base")
+
+
+def _page_text(page) -> str:
+    # "blocks" is cheaper than "text" and sort=True gives reading order;
+    # block tuples are (x0, y0, x1, y1, text, block_no, block_type), type 0 = text
+    return "".join(b[4] for b in page.get_text("blocks", sort=True) if b[6] == 0)
+
+
+# Text boxes are stored twice (DrawingML choice + VML fallback); only read the choice
+_MC_FALLBACK = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+
 
-        # Temporary file handling
-        self.temp_dir = tempfile.mkdtemp()
-        self.temp_path = os.path.join(self.temp_dir, file.filename)
+def _docx_blocks(container, parent) -> list:
+    """Paragraph, text-box, table and content-control text of a docx body/header/footer, in document order."""
+    parts = []
+    for el in container.iterchildren():
+        if el.tag == qn("w:p"):
+            parts.append(Paragraph(el, parent).text)
+            for box in el.iter(qn("w:txbxContent")):
+                if next(box.iterancestors(_MC_FALLBACK), None) is None:
+                    parts.extend(Paragraph(p, parent).text for p in box.iter(qn("w:p")))
+        elif el.tag == qn("w:tbl"):
+            for row in Table(el, parent).rows:
+                parts.append(" | ".join(cell.text for cell in row.cells))
+        elif el.tag == qn("w:sdt"):
+            # content controls (cover pages, templates) wrap ordinary body content
+            content = el.find(qn("w:sdtContent"))
+            if content is not None:
+                parts += _docx_blocks(content, parent)
+    return parts
 
-        with open(self.temp_path, "wb") as f:
-            shutil.copyfileobj(file.file, f)
 
-        self.file_hash = self._compute_hash(self.temp_path)
+def _pptx_shape_texts(shapes):
+    """Yield text from text frames and tables, descending into grouped shapes."""
+    for shape in shapes:
+        if shape.shape_type == MSO_SHAPE_TYPE.GROUP:
+            yield from _pptx_shape_texts(shape.shapes)
+        elif shape.has_text_frame:
+            yield shape.text_frame.text
+        elif shape.has_table:
+            for row in shape.table.rows:
+                yield " | ".join(cell.text for cell in row.cells)
+
+
+def _ocr_page(pdf_path: str, page_index: int) -> str:
+    """Render a single page and OCR it, so only one page image is alive per thread."""
+    images = convert_from_path(pdf_path, first_page=page_index + 1, last_page=page_index + 1)
+    return pytesseract.image_to_string(images[0]) if images else ""
+
+
+class FileProcessor:
+    def __init__(self, file_name: str, temp_dir: str, temp_path: str, file_hash: str, include_examples: bool = True):
+        self.file_name = file_name
+        self.include_examples = include_examples
+        self.temp_dir = temp_dir
+        self.temp_path = temp_path
+        self.file_hash = file_hash
+
+    def cleanup(self):
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
 
     # -------------------------------------
     # Utility Methods
     # -------------------------------------
-    def _compute_hash(self, path: str) -> str:
-        sha256 = hashlib.sha256()
-        with open(path, "rb") as f:
-            for block in iter(lambda: f.read(65536), b""):
-                sha256.update(block)
-        return sha256.hexdigest()
-
     def _convert_to_pdf(self, input_path: str) -> str:
         """Convert any file to PDF using LibreOffice."""
         if input_path.lower().endswith(".pdf"):
             return input_path
 
+        pdf_name = os.path.splitext(os.path.basename(input_path))[0] + ".pdf"
+        pdf_path = os.path.join(self.temp_dir, pdf_name)
+
+        # Prefer the warm LibreOffice server; fall back to a one-off process
+        if libreoffice_server.convert_to_pdf(input_path, pdf_path):
+            return pdf_path
+
         cmd = [
             "libreoffice",
             "--headless",
@@ -59,94 +121,156 @@ class FileProcessor:
             input_path,
         ]
         subprocess.run(cmd, check=True)
-        pdf_name = os.path.splitext(os.path.basename(input_path))[0] + ".pdf"
-        return os.path.join(self.temp_dir, pdf_name)
+        return pdf_path
+
+    def _extract_text(self, path: str) -> str:
+        """Extract text directly where possible; only route other formats through PDF."""
+        ext = os.path.splitext(path)[1].lower()
+        if ext == ".docx":
+            return self._extract_text_from_docx(path)
+        if ext == ".pptx":
+            return self._extract_text_from_pptx(path)
+        if ext == ".txt":
+            with open(path, encoding="utf-8", errors="replace") as f:
+                return f.read()
+
+        pdf_path = self._convert_to_pdf(path)
+        return self._extract_text_from_pdf(pdf_path)
+
+    def _extract_text_from_docx(self, docx_path: str) -> str:
+        """Extract a .docx without LibreOffice: headers, body in document order, footers."""
+        doc = Document(docx_path)
+        headers, footers = [], []
+        for section in doc.sections:
+            # a linked header/footer repeats the previous section's (or there is none)
+            if not section.header.is_linked_to_previous:
+                headers += _docx_blocks(section.header._element, section.header)
+            if not section.footer.is_linked_to_previous:
+                footers += _docx_blocks(section.footer._element, section.footer)
+        parts = headers + _docx_blocks(doc.element.body, doc._body) + footers
+        return "\n".join(t for t in parts if t.strip())
+
+    def _extract_text_from_pptx(self, pptx_path: str) -> str:
+        """Extract slide text (text frames, tables, grouped shapes) from a .pptx without LibreOffice."""
+        prs = Presentation(pptx_path)
+        parts = [t for slide in prs.slides for t in _pptx_shape_texts(slide.shapes)]
+        return "\n".join(t for t in parts if t.strip())
 
     def _extract_text_from_pdf(self, pdf_path: str) -> str:
-        """Extract text from a PDF."""
-        doc = fitz.open(pdf_path)
-        full_text = "\n".join(page.get_text("text") for page in doc if page.get_text("text").strip())
-        return full_text
+        """Extract text from a PDF; OCR scanned PDFs.
+
+        This runs inside a Celery prefork child, which is daemonic and may not start
+        processes of its own: parallelism across documents comes from worker concurrency.
+        """
+        with fitz.open(pdf_path) as doc:
+            page_count = doc.page_count
+            # one get_text per page, filtering empties in the same pass
+            full_text = "\n".join(t for t in map(_page_text, doc) if t.strip())
+
+        if full_text:
+            return full_text
+
+        # No text layer (scanned document) -> OCR page by page
+        logger.info("No embedded text found — falling back to OCR.")
+        with ThreadPoolExecutor(max_workers=OCR_THREADS) as ex:
+            texts = list(ex.map(lambda i: _ocr_page(pdf_path, i), range(page_count)))
+        return "\n".join(t for t in texts if t.strip())
 
     def _check_token_limit(self, text: str):
         """Ensure document size fits within Gemini model limits."""
-        encoding = tiktoken.get_encoding("cl100k_base")
-        num_tokens = len(encoding.encode(text))
+        # Every token covers at least one UTF-8 byte, so the byte length is a safe
+        # upper bound; only tokenize documents that could actually be over the limit.
+        if len(text.encode("utf-8")) <= MAX_INPUT_TOKENS:
+            return
+        # encode_ordinary skips the special-token scan; uploaded text is never a control sequence
+        num_tokens = len(_encoder().encode_ordinary(text))
         if num_tokens > MAX_INPUT_TOKENS:
             raise ValueError(
                 f"Document too large: {num_tokens} tokens (max {MAX_INPUT_TOKENS})"
             )
 
     # -------------------------------------
-    # Main Processing Pipeline
+    # Database Helpers (blocking; run in threads)
+    # Each opens its own short session, so no connection is held while we extract
+    # text or wait on Gemini.
     # -------------------------------------
-    def process_file(self):
-        start_time = time.time()
-        try:
-            # Step 1: Convert and extract text
-            pdf_path = self._convert_to_pdf(self.temp_path)
-            pdf_text = self._extract_text_from_pdf(pdf_path)
-
-            if not pdf_text.strip():
-                raise ValueError("No text found in uploaded document.")
-
-            # Step 2: Check token limit
-            self._check_token_limit(pdf_text)
-
-            # Step 3: Check cache
-            existing = self.db.execute(
+    def _fetch_existing(self):
+        with SessionManager() as db:
+            return db.execute(
                 text("SELECT summary_text, token_usage FROM file_summaries WHERE file_hash = :file_hash"),
                 {"file_hash": self.file_hash},
             ).fetchone()
 
+    def _save_summary(self, summary_text: str, token_usage: dict):
+        # On a concurrent duplicate the no-op DO UPDATE makes RETURNING hand back
+        # the existing row, so either way it's one round-trip.
+        with SessionManager() as db:
+            saved = db.execute(
+                text("""
+                    INSERT INTO file_summaries (file_hash, file_name, summary_text, token_usage)
+                    VALUES (:file_hash, :file_name, :summary_text, :token_usage)
+                    ON CONFLICT (file_hash) DO UPDATE SET file_hash = EXCLUDED.file_hash
+                    RETURNING summary_text, token_usage, (xmax = 0) AS inserted
+                """).bindparams(bindparam("token_usage", type_=JSONB)),
+                {
+                    "file_hash": self.file_hash,
+                    "file_name": self.file_name,
+                    "summary_text": summary_text,
+                    "token_usage": token_usage,
+                },
+            ).fetchone()
+            db.commit()
+            return saved
+
+    # -------------------------------------
+    # Main Processing Pipeline
+    # -------------------------------------
+    async def process_file(self):
+        start_time = time.time()
+        try:
+            # Step 1: Check cache (a duplicate job may have finished this file meanwhile).
+            # The DB session and extraction are blocking, so they run in worker threads.
+            existing = await asyncio.to_thread(self._fetch_existing)
+
             if existing:
                 logger.info("File already processed — returning cached notes.")
-                token_usage = json.loads(existing[1]) if existing[1] else None
                 return {
-                    "file_name": self.file.filename,
+                    "file_name": self.file_name,
                     "file_hash": self.file_hash,
                     "structured_notes": existing[0],
-                    "token_usage": token_usage,
+                    "token_usage": existing[1],
                     "processing_time": 0.0,
                     "cached": True,
                 }
 
+            # Step 2: Extract text (converting to PDF only when needed)
+            pdf_text = await asyncio.to_thread(self._extract_text, self.temp_path)
+
+            if not pdf_text.strip():
+                raise ValueError("No text found in uploaded document.")
+
+            # Step 3: Check token limit
+            self._check_token_limit(pdf_text)
+
             # Step 4: Rewrite notes using Gemini
             logger.info("Rewriting notes using Gemini full-text mode...")
-            rewritten_notes, token_usage = rewrite_notes_full(
+            rewritten_notes, token_usage = await rewrite_notes_full(
                 pdf_text, include_examples=self.include_examples
             )
 
             # Step 5: Save to DB
-            try:
-                self.db.execute(
-                    text("""
-                        INSERT INTO file_summaries (file_hash, file_name, summary_text, token_usage, created_at)
-                        VALUES (:file_hash, :file_name, :summary_text, :token_usage, CURRENT_TIMESTAMP)
-                    """),
-                    {
-                        "file_hash": self.file_hash,
-                        "file_name": self.file.filename,
-                        "summary_text": rewritten_notes,
-                        "token_usage": json.dumps(token_usage),  # store as JSON
-                    },
-                )
-                self.db.commit()
+            saved = await asyncio.to_thread(self._save_summary, rewritten_notes, token_usage)
+            if saved.inserted:
                 logger.info("File processed and saved successfully.")
-            except IntegrityError:
-                self.db.rollback()
-                existing = self.db.execute(
-                    text("SELECT summary_text, token_usage FROM file_summaries WHERE file_hash = :file_hash"),
-                    {"file_hash": self.file_hash},
-                ).fetchone()
-                rewritten_notes = existing[0]
-                token_usage = json.loads(existing[1]) if existing[1] else None
+            else:
+                rewritten_notes = saved[0]
+                token_usage = saved[1]
                 logger.info("Duplicate file detected — returning existing summary.")
 
             # Step 6: Return results
             processing_time = time.time() - start_time
             return {
-                "file_name": self.file.filename,
+                "file_name": self.file_name,
                 "file_hash": self.file_hash,
                 "structured_notes": rewritten_notes,
                 "token_usage": token_usage,
@@ -156,4 +280,4 @@ class FileProcessor:
 
         finally:
             # Cleanup temp files
-            shutil.rmtree(self.temp_dir, ignore_errors=True)
+            self.cleanup()
@@ -0,0 +1,43 @@
+# app/processors/libreoffice_server.py
+import logging
+import subprocess
+import xmlrpc.client
+from unoserver.client import UnoClient
+from app.core.config import settings
+
+logger = logging.getLogger("libreoffice_server")
+
+_server = None
+
+
+def start_libreoffice_server():
+    """Start one long-lived headless LibreOffice (via unoserver) so conversions skip the cold start."""
+    global _server
+    if _server is not None and _server.poll() is None:
+        return
+    logger.info("Starting unoserver on %s:%s", settings.UNOSERVER_HOST, settings.UNOSERVER_PORT)
+    _server = subprocess.Popen(
+        ["unoserver", "--interface", settings.UNOSERVER_HOST, "--port", str(settings.UNOSERVER_PORT)]
+    )
+
+
+def stop_libreoffice_server():
+    global _server
+    if _server is not None and _server.poll() is None:
+        _server.terminate()
+        try:
+            _server.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            _server.kill()
+    _server = None
+
+
+def convert_to_pdf(input_path: str, pdf_path: str) -> bool:
+    """Convert through the running server. Returns False if it is unreachable."""
+    try:
+        client = UnoClient(server=settings.UNOSERVER_HOST, port=str(settings.UNOSERVER_PORT))
+        client.convert(inpath=input_path, outpath=pdf_path, convert_to="pdf")
+        return True
+    except (OSError, xmlrpc.client.Error) as e:
+        logger.warning("unoserver unavailable (%s)", e)
+        return False
@@ -0,0 +1,79 @@
+# app/processors/uploads.py
+# Upload staging for the API process. Kept free of the extraction/LLM stack so web
+# workers don't import PyMuPDF, OCR or Gemini just to hash a file and enqueue a job.
+import asyncio
+import os
+import shutil
+import tempfile
+
+import blake3
+
+from app.core.config import settings
+
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB: fewer read/write/update round-trips per upload
+IN_MEMORY_UPLOAD_LIMIT = 64 * 1024 * 1024  # smaller uploads are hashed in memory, written only on a cache miss
+
+
+class StagedUpload:
+    def __init__(self, file_name: str, temp_dir: str, temp_path: str, file_hash: str):
+        self.file_name = file_name
+        self.temp_dir = temp_dir
+        self.temp_path = temp_path
+        self.file_hash = file_hash
+        self._data = None  # upload bytes not yet written to disk
+
+    @classmethod
+    async def create(cls, file):
+        """Hash the upload; small files stay in memory until persist(), large ones stream to disk."""
+        if file.size is not None and file.size < IN_MEMORY_UPLOAD_LIMIT:
+            data = await file.read()
+            # BLAKE3 is a cache key, not a security primitive: SIMD + multithreaded, and it
+            # releases the GIL, so hash off the event loop
+            file_hash = (await asyncio.to_thread(blake3.blake3, data, max_threads=blake3.blake3.AUTO)).hexdigest()
+            upload = cls(file.filename, None, None, file_hash)
+            upload._data = data
+            return upload
+
+        # Large uploads stream to disk; every filesystem call and hash update runs in a
+        # thread so the event loop keeps serving other requests meanwhile
+        temp_dir, temp_path = await asyncio.to_thread(cls._make_temp_path, file.filename)
+        upload = cls(file.filename, temp_dir, temp_path, None)
+        hasher = blake3.blake3()
+        try:
+            f = await asyncio.to_thread(open, temp_path, "wb")
+            try:
+                while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                    await asyncio.to_thread(cls._write_chunk, f, hasher, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+        except BaseException:
+            await asyncio.to_thread(upload.cleanup)
+            raise
+
+        upload.file_hash = hasher.hexdigest()
+        return upload
+
+    @staticmethod
+    def _write_chunk(f, hasher, chunk: bytes):
+        hasher.update(chunk)
+        f.write(chunk)
+
+    @staticmethod
+    def _make_temp_path(file_name: str):
+        os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
+        temp_dir = tempfile.mkdtemp(dir=settings.UPLOAD_DIR)
+        return temp_dir, os.path.join(temp_dir, file_name)
+
+    def persist(self):
+        """Write an in-memory upload to the shared upload dir so a worker can pick it up."""
+        if self._data is None:
+            return
+        self.temp_dir, self.temp_path = self._make_temp_path(self.file_name)
+        with open(self.temp_path, "wb") as f:
+            f.write(self._data)
+        self._data = None
+
+    def cleanup(self):
+        self._data = None
+        if self.temp_dir:
+            shutil.rmtree(self.temp_dir, ignore_errors=True)
@@ -1,80 +1,100 @@
 # app/processors/youtube_processor.py
+import asyncio
 import yt_dlp
 import tempfile
 import os
 import shutil
-import hashlib
-import whisper
-import spacy
+import subprocess
+import numpy as np
+from faster_whisper import WhisperModel
 import logging
 
 from app.models.llm.gemini_model import generate_youtube_summary
+from app.processors.youtube_urls import video_url_hash
 
 logger = logging.getLogger("youtube_processor")
-nlp = spacy.load("en_core_web_sm")
+
+_whisper_model = None
+
+def _get_whisper_model():
+    """Load Whisper once per worker process instead of once per video."""
+    global _whisper_model
+    if _whisper_model is None:
+        # CTranslate2 int8 kernels: roughly half the RAM and several times faster than FP32 on CPU
+        _whisper_model = WhisperModel("base", device="cpu", compute_type="int8", cpu_threads=os.cpu_count() or 0)
+    return _whisper_model
 
 
 class YouTubeProcessor:
     def __init__(self, url: str):
         self.url = url
         self.temp_dir = tempfile.mkdtemp()
-        self.url_hash = hashlib.sha256(url.encode()).hexdigest()
+        self.url_hash = video_url_hash(url)
 
     def _sanitize_filename(self, filename: str) -> str:
         """Remove unsafe characters from filenames."""
         return "".join(c for c in filename if c.isalnum() or c in (" ", ".", "_", "-")).strip()
 
     def _download_audio(self) -> str:
-        """Download audio from YouTube and return the final mp3 path."""
+        """Download audio from YouTube in its original container and return its path."""
+        # No FFmpegExtractAudio/mp3 step: the audio is decoded exactly once, in _decode_audio
         ydl_opts = {
             "format": "bestaudio/best",
             "outtmpl": os.path.join(self.temp_dir, "%(title)s.%(ext)s"),
-            "postprocessors": [
-                {"key": "FFmpegExtractAudio", "preferredcodec": "mp3"}
-            ],
             "quiet": True,
         }
 
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(self.url, download=True)
-            # Use the "filepath" from the postprocessed result
             audio_path = ydl.prepare_filename(info)
-            # Replace extension with .mp3 since FFmpeg converts it
-            if audio_path.endswith(".webm") or audio_path.endswith(".m4a"):
-                audio_path = audio_path.rsplit(".", 1)[0] + ".mp3"
 
         logger.info("Downloaded audio: %s", audio_path)
         return audio_path
 
+    def _decode_audio(self, audio_path: str) -> np.ndarray:
+        """Decode to 16 kHz mono float32 PCM through an ffmpeg pipe (Whisper's input format)."""
+        cmd = [
+            "ffmpeg",
+            "-nostdin",
+            "-loglevel", "error",
+            "-i", audio_path,
+            "-f", "s16le",
+            "-ac", "1",
+            "-ar", "16000",
+            "-",
+        ]
+        pcm = subprocess.run(cmd, stdout=subprocess.PIPE, check=True).stdout
+        audio = np.frombuffer(pcm, np.int16).astype(np.float32)
+        del pcm  # the int16 bytes are no longer needed; free them before Whisper runs
+        audio /= 32768.0  # in place: one float32 array at peak, not two
+        return audio
+
     def _transcribe_audio(self, audio_path: str) -> str:
-        """Transcribe audio using Whisper."""
+        """Transcribe audio using Whisper, skipping silence with VAD."""
         logger.info("Transcribing audio with Whisper...")
-        model = whisper.load_model("base", device="cpu")
-        result = model.transcribe(audio_path)
-        return result["text"]
-
-    def _clean_text(self, text: str) -> str:
-        """Remove stopwords and punctuation from transcript."""
-        doc = nlp(text)
-        tokens = [t.text for t in doc if not t.is_stop and not t.is_punct]
-        return " ".join(tokens)
+        segments, _ = _get_whisper_model().transcribe(
+            self._decode_audio(audio_path), vad_filter=True, vad_parameters=dict(min_silence_duration_ms=500)
+        )
+        return "".join(segment.text for segment in segments)
 
-    def process_video(self) -> dict:
-        """Full pipeline: download, transcribe, clean, and summarize."""
+    async def process_video(self) -> dict:
+        """Full pipeline: download, transcribe, and summarize."""
         try:
-            audio_path = self._download_audio()
-            transcript = self._transcribe_audio(audio_path)
-            clean_text = self._clean_text(transcript)
+            # yt-dlp and Whisper are blocking; only they occupy a thread
+            audio_path = await asyncio.to_thread(self._download_audio)
+            transcript = await asyncio.to_thread(self._transcribe_audio, audio_path)
 
-            # Summarize with Gemini (smart chunking handled inside)
-            structured_notes = generate_youtube_summary(
-                clean_text, max_sentences=5, include_examples=False
+            # Summarize with Gemini (smart chunking handled inside); the LLM
+            # works better on the original prose than on stopword-stripped text
+            structured_notes, token_usage = await generate_youtube_summary(
+                transcript, max_sentences=5, include_examples=False
             )
 
             return {
                 "video_url": self.url,
                 "url_hash": self.url_hash,
-                "structured_notes": structured_notes,  
+                "structured_notes": structured_notes,
+                "token_usage": token_usage,
             }
         finally:
             shutil.rmtree(self.temp_dir, ignore_errors=True)
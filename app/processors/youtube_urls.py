@@ -0,0 +1,20 @@
+# app/processors/youtube_urls.py
+# Stdlib-only so the API can compute cache keys without importing yt-dlp/Whisper.
+import hashlib
+import re
+
+_VIDEO_ID_RE = re.compile(
+    r"(?:youtube\.com/(?:watch\?(?:.*&)?v=|shorts/|embed/|live/|v/)|youtu\.be/)([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+)
+
+
+def canonical_video_url(url: str) -> str:
+    """Map youtu.be / shorts / embed / extra-param URLs of a video to one watch URL (the cache key)."""
+    match = _VIDEO_ID_RE.search(url)
+    if match:
+        return f"https://www.youtube.com/watch?v={match.group(1)}"
+    return url.strip()
+
+
+def video_url_hash(url: str) -> str:
+    return hashlib.sha256(canonical_video_url(url).encode()).hexdigest()
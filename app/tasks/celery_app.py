@@ -0,0 +1,68 @@
+# app/tasks/celery_app.py
+# Worker: celery -A app.tasks.celery_app worker -Q gemini_queue
+import asyncio
+from celery import Celery
+from celery.signals import worker_init, worker_shutdown, worker_process_init, worker_process_shutdown
+from app.core.config import settings
+
+celery = Celery(
+    "notes",
+    broker=settings.REDIS_URL,
+    backend=settings.REDIS_URL,
+    include=["app.tasks.notes_tasks"],
+)
+
+celery.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    # Long LLM jobs: hand out one task at a time and only ack once it has finished
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    # a worker started without -Q still consumes the queue the tasks are routed to
+    task_default_queue="gemini_queue",
+    task_routes={
+        "app.tasks.notes_tasks.process_document_task": {"queue": "gemini_queue"},
+        "app.tasks.notes_tasks.process_youtube_task": {"queue": "gemini_queue"},
+    },
+)
+
+
+@worker_init.connect
+def _start_libreoffice_server(**kwargs):
+    from app.processors.libreoffice_server import start_libreoffice_server
+    start_libreoffice_server()
+
+
+@worker_shutdown.connect
+def _stop_libreoffice_server(**kwargs):
+    from app.processors.libreoffice_server import stop_libreoffice_server
+    stop_libreoffice_server()
+
+
+# One event loop per worker process, reused by every task. The genai async client's
+# pooled connections are bound to the loop that opened them, so a fresh asyncio.run()
+# per task would hand later tasks transports from a closed loop.
+_loop = None
+
+
+@worker_process_init.connect
+def _init_event_loop(**kwargs):
+    global _loop
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+
+@worker_process_shutdown.connect
+def _close_event_loop(**kwargs):
+    if _loop is not None:
+        _loop.close()
+
+
+def run_async(coro):
+    """Run a coroutine to completion on this worker process's event loop."""
+    if _loop is None:
+        # solo pool / eager mode: no worker_process_init
+        _init_event_loop()
+    return _loop.run_until_complete(coro)
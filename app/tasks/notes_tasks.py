@@ -0,0 +1,50 @@
+# app/tasks/notes_tasks.py
+import logging
+from app.tasks.celery_app import celery, run_async
+from app.core.cache import set_cached_summary, summary_lock
+from app.db.session import SessionManager
+from app.db.crud import get_file_summary, save_file_summary
+from app.processors.file_processor import FileProcessor
+from app.processors.youtube_processor import YouTubeProcessor
+
+logger = logging.getLogger("notes_tasks")
+
+
+@celery.task
+def process_document_task(temp_dir: str, temp_path: str, file_hash: str, file_name: str, include_examples: bool = True):
+    """Run the document pipeline on a file already persisted to the shared upload dir."""
+    # identical concurrent uploads wait here and then hit the DB cache inside process_file
+    with summary_lock(file_hash):
+        processor = FileProcessor(
+            file_name=file_name,
+            temp_dir=temp_dir,
+            temp_path=temp_path,
+            file_hash=file_hash,
+            include_examples=include_examples,
+        )
+        result = run_async(processor.process_file())
+    set_cached_summary(file_hash, {"summary_text": result["structured_notes"], "token_usage": result["token_usage"]})
+    processing_time_min = result["processing_time"] / 60
+    return {
+        "structured_notes": result["structured_notes"],
+        "cached": result["cached"],
+        "processing_time_minutes": round(processing_time_min, 2),
+    }
+
+
+@celery.task
+def process_youtube_task(youtube_url: str, url_hash: str):
+    """Download, transcribe and summarize a YouTube video, then cache the notes."""
+    with summary_lock(url_hash):
+        with SessionManager() as db:
+            cached = get_file_summary(db, url_hash)
+        if cached:
+            return {"notes": cached["summary_text"], "cached": True}
+
+        processor = YouTubeProcessor(url=youtube_url)
+        result = run_async(processor.process_video())
+
+        with SessionManager() as db:
+            saved = save_file_summary(db, url_hash, "youtube_audio", result["structured_notes"], result["token_usage"])
+    set_cached_summary(url_hash, saved)
+    return {"notes": saved["summary_text"], "cached": False}
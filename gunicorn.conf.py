@@ -0,0 +1,7 @@
+# gunicorn.conf.py
+# Usage: gunicorn -c gunicorn.conf.py app.main:app
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"